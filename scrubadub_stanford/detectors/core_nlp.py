@@ -22,7 +22,7 @@ from scrubadub.filth.name import NameFilth
 from scrubadub.filth.organization import OrganizationFilth
 from scrubadub.filth.location import LocationFilth
 
-from .utils import tag_helper
+from .utils import tag_helper, validate_backend
 
 # Default installation directory for CoreNLP download (500MB)
 HOME_DIR = str(Path.home())
@@ -53,7 +53,7 @@ class CoreNlpEntityDetector(Detector):
     name = "corenlp"
 
     def __init__(self, enable_person: bool = True, enable_organization: bool = True, enable_location: bool = False,
-                 ignored_words: List[str] = None,
+                 ignored_words: List[str] = None, backend: str = 're',
                  **kwargs):
         """Initialise the ``Detector``.
 
@@ -65,6 +65,9 @@ class CoreNlpEntityDetector(Detector):
         :type enable_location: bool
         :param ignored_words: A list of words that will be ignored by the NER tagging. Defaults to `['tennant']`.
         :type ignored_words: List[str]
+        :param backend: The regex engine used to find the tagged entities in the text, one of ``'re'``, ``'re2'``
+                        or ``'hyperscan'``, defaults to ``'re'``.
+        :type backend: str
         :param name: Overrides the default name of the :class:``Detector``
         :type name: str, optional
         :param locale: The locale of the documents in the format: 2 letter lower-case language code followed by an
@@ -79,6 +82,8 @@ class CoreNlpEntityDetector(Detector):
         if enable_location:
             self.filth_lookup['LOCATION'] = LocationFilth
         self.ignored_words = ['tennant'] if ignored_words is None else ignored_words
+        validate_backend(backend)
+        self.backend = backend
 
         super(CoreNlpEntityDetector, self).__init__(**kwargs)
 
@@ -124,11 +129,11 @@ class CoreNlpEntityDetector(Detector):
         with CoreNLPClient(be_quiet=True) as client:
             annotation = client.annotate(text)
 
-        # List of tuples of token/NER tag for each token of each annotated sentence:
-        tags = [(token.value, token.ner) for sentence in annotation.sentence for token in sentence.token]
+        # Tuples of token/NER tag for each token of each annotated sentence, generated as tag_helper consumes them:
+        tags = ((token.value, token.ner) for sentence in annotation.sentence for token in sentence.token)
         # Loop over all tagged words and join contiguous words tagged as people
         return tag_helper(text=text, tags=tags, filth_lookup=self.filth_lookup, ignored_words=self.ignored_words,
-                          name=self.name, locale=self.locale, document_name=document_name)
+                          name=self.name, locale=self.locale, document_name=document_name, backend=self.backend)
 
     @classmethod
     def supported_locale(cls, locale: str) -> bool:
@@ -27,7 +27,7 @@ from scrubadub.filth.name import NameFilth
 from scrubadub.filth.organization import OrganizationFilth
 from scrubadub.filth.location import LocationFilth
 
-from .utils import tag_helper
+from .utils import tag_helper, validate_backend
 
 
 class ScrubadubStanfordNERTagger(nltk.tag.StanfordNERTagger):
@@ -77,9 +77,12 @@ class StanfordEntityDetector(Detector):
     stanford_download_url = 'https://nlp.stanford.edu/software/stanford-ner-{version}.zip'
 
     def __init__(self, enable_person: bool = True, enable_organization: bool = True, enable_location: bool = False,
-                 **kwargs):
+                 backend: str = 're', **kwargs):
         """Initialise the ``Detector``.
 
+        :param backend: The regex engine used to find the tagged entities in the text, one of ``'re'``, ``'re2'``
+                        or ``'hyperscan'``, defaults to ``'re'``.
+        :type backend: str
         :param name: Overrides the default name of the :class:``Detector``
         :type name: str, optional
         :param locale: The locale of the documents in the format: 2 letter lower-case language code followed by an
@@ -87,6 +90,8 @@ class StanfordEntityDetector(Detector):
         :type locale: str, optional
         """
         self.stanford_tagger = None  # type: Optional[nltk.tag.StanfordNERTagger]
+        validate_backend(backend)
+        self.backend = backend
 
         self.filth_lookup = {}  # type: Dict[str, Type[Filth]]
         if enable_person:
@@ -175,7 +180,7 @@ class StanfordEntityDetector(Detector):
         tokens = nltk.tokenize.word_tokenize(text)
         tags = self.stanford_tagger.tag(tokens)
         return tag_helper(text=text, tags=tags, filth_lookup=self.filth_lookup, ignored_words=self.ignored_words,
-                          name=self.name, locale=self.locale, document_name=document_name)
+                          name=self.name, locale=self.locale, document_name=document_name, backend=self.backend)
 
     @classmethod
     def supported_locale(cls, locale: str) -> bool:
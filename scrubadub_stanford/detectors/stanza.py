@@ -9,10 +9,17 @@ is ``~/stanza_resources`` and it is around 210MB in size. If another location is
 path in the environment variable ``STANZA_RESOURCES_DIR``.
 
 """
+import hashlib
+import multiprocessing
 import os
+import threading
+import warnings
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Dict, Type, Optional
+from typing import List, Dict, Type, Optional, Tuple, Sequence, Any, Union, Iterable
 
+import stanza
+import torch
 from stanza import Pipeline
 
 from scrubadub.detectors.catalogue import register_detector
@@ -22,7 +29,7 @@ from scrubadub.filth.name import NameFilth
 from scrubadub.filth.organization import OrganizationFilth
 from scrubadub.filth.location import LocationFilth
 
-from .utils import tag_helper
+from .utils import offset_helper, normalise_words
 
 # Default installation directory for Stanza download (210MB)
 HOME_DIR = str(Path.home())
@@ -32,6 +39,94 @@ DEFAULT_STANZA_DIR = os.getenv(
 )
 
 
+def _ner_trainers(pipeline: Pipeline) -> List[Any]:
+    """Return the trainers that hold the torch models of the pipeline's NER processor.
+
+    :param pipeline: The Stanza pipeline containing a ``ner`` processor.
+    :type pipeline: Pipeline
+    :return: The NER trainers, each with a ``model`` attribute.
+    :rtype: List[Any]
+    """
+    processor = pipeline.processors['ner']
+    # Newer versions of Stanza can run several NER models in the one processor
+    trainers = getattr(processor, 'trainers', None)
+    if trainers is None:
+        trainers = [processor.trainer]
+    return list(trainers)
+
+
+def _quantize_ner(pipeline: Pipeline) -> None:
+    """Apply dynamic int8 quantization to the linear and LSTM layers of the pipeline's NER models on the CPU.
+
+    :param pipeline: The Stanza pipeline containing a ``ner`` processor.
+    :type pipeline: Pipeline
+    """
+    quantized = False
+    for trainer in _ner_trainers(pipeline):
+        # Quantized kernels are only available on the CPU
+        if next(trainer.model.parameters()).is_cuda:
+            continue
+        trainer.model = torch.quantization.quantize_dynamic(
+            trainer.model, {torch.nn.Linear, torch.nn.LSTM}, dtype=torch.qint8
+        )
+        quantized = True
+
+    capability = getattr(torch.backends.cpu, 'get_cpu_capability', lambda: None)()
+    if quantized and capability is not None and not capability.startswith('AVX'):
+        warnings.warn(
+            'This CPU ({}) lacks AVX2/AVX512 support, int8 quantization of the NER model will reduce its memory '
+            'usage but may not make it faster.'.format(capability)
+        )
+
+
+def _doc_entities(doc: stanza.Document) -> List[Tuple[int, int, str, str]]:
+    """Return the start, end, text and type of each entity in an annotated document.
+
+    :param doc: The annotated document.
+    :type doc: stanza.Document
+    :return: Tuples of the start, end, text and type of each entity.
+    :rtype: List[Tuple[int, int, str, str]]
+    """
+    return [(ent.start_char, ent.end_char, ent.text, ent.type) for ent in doc.ents]
+
+
+# The pipeline of a worker process started by StanzaEntityDetector.iter_filth_many
+_worker_pipeline = None  # type: Optional[Pipeline]
+
+
+def _worker_init(config: Dict[str, Any], num_threads: int) -> None:
+    """Load the pipeline in a worker process.
+
+    A forked worker inherits the pipeline cache of its parent, so if the parent already loaded the pipeline with
+    ``StanzaEntityDetector.warmup`` the worker shares those models copy-on-write instead of loading its own. A
+    spawned worker starts with an empty cache and loads its own copy of the models here.
+
+    :param config: The arguments to ``StanzaEntityDetector._get_pipeline``.
+    :type config: Dict[str, Any]
+    :param num_threads: The number of threads torch may use in this worker, so that the workers don't oversubscribe
+                        the CPU between them.
+    :type num_threads: int
+    """
+    global _worker_pipeline
+    torch.set_num_threads(num_threads)
+    _worker_pipeline = StanzaEntityDetector._get_pipeline(**config)
+
+
+def _worker_annotate(task: Tuple[int, str]) -> Tuple[int, List[Tuple[int, int, str, str]]]:
+    """Run a document through the pipeline of a worker process.
+
+    Only plain tuples are sent back to the parent process, rather than the annotated document or any ``Filth``.
+
+    :param task: The index and text of the document.
+    :type task: Tuple[int, str]
+    :return: The index of the document and the start, end, text and type of each of its entities.
+    :rtype: Tuple[int, List[Tuple[int, int, str, str]]]
+    """
+    index, text = task
+    assert _worker_pipeline is not None
+    return index, _doc_entities(_worker_pipeline(text))
+
+
 class StanzaEntityDetector(Detector):
     """Search for people's names, organization's names and locations within text using the stanford 3 class model.
 
@@ -48,13 +143,29 @@ class StanzaEntityDetector(Detector):
     >>> scrubber = scrubadub.Scrubber(detector_list=[detector])
     >>> scrubber.clean('Jane has an appointment at the National Hospital of Neurology and Neurosurgery today.')
     '{{NAME}} has an appointment at {{ORGANIZATION}} today.'
+
+    Only the spans that Stanza tags as entities are reported. Unlike ``StanfordEntityDetector`` and
+    ``CoreNlpEntityDetector``, which search the text for every occurrence of each tagged entity, other mentions of
+    the same name that Stanza did not tag in their own context are left in the text.
+
+    Stanza's neural tokenizer is one of the slowest parts of the pipeline. If the text has already been tokenized,
+    pass ``pretokenized=True`` to skip it. The text should then contain tokens separated by single spaces and
+    sentences separated by new lines, or be given as a list of sentences that are each a list of tokens. If
+    sentence splitting is not wanted, but the text is not tokenized, pass ``no_ssplit=True`` instead.
+    See https://stanfordnlp.github.io/stanza/tokenize.html for more details.
     """
     filth_cls = Filth
     name = "stanza"
 
+    # Pipelines are expensive to build (model load from disk), so they are shared between instances
+    _pipeline_cache = {}  # type: Dict[Tuple, Pipeline]
+    _pipeline_lock = threading.Lock()
+
     def __init__(self, enable_person: bool = True, enable_organization: bool = True, enable_location: bool = False,
-                 ignored_words: List[str] = None,
-                 **kwargs):
+                 ignored_words: List[str] = None, tokenize_batch_size: int = 32, ner_batch_size: int = 64,
+                 pretokenized: bool = False, no_ssplit: bool = False, use_gpu: bool = True,
+                 device: Optional[str] = None, fp16: bool = False, int8: bool = False, doc_cache_size: int = 1024,
+                 workers: int = 1, **kwargs):
         """Initialise the ``Detector``.
 
         :param enable_person: To tag entities that are recognised as person, defaults to ``True``.
@@ -65,6 +176,34 @@ class StanzaEntityDetector(Detector):
         :type enable_location: bool
         :param ignored_words: A list of words that will be ignored by the NER tagging. Defaults to ``['tennant']``.
         :type ignored_words: List[str]
+        :param tokenize_batch_size: The batch size used by Stanza's tokenizer, defaults to ``32``.
+        :type tokenize_batch_size: int
+        :param ner_batch_size: The batch size used by Stanza's NER tagger, defaults to ``64``.
+        :type ner_batch_size: int
+        :param pretokenized: Set if the text is already tokenized and split into sentences, to skip Stanza's
+                             tokenizer, defaults to ``False``.
+        :type pretokenized: bool
+        :param no_ssplit: Set if the text should be tokenized, but not split into sentences, defaults to ``False``.
+        :type no_ssplit: bool
+        :param use_gpu: Run the models on the GPU if one is available, defaults to ``True``.
+        :type use_gpu: bool
+        :param device: The torch device to run the models on, eg ``'cuda:1'``, defaults to Stanza's choice.
+        :type device: str, optional
+        :param fp16: Cast the NER model to half precision when it runs on a GPU, defaults to ``False``. This is
+                     ignored when running on the CPU.
+        :type fp16: bool
+        :param int8: Apply dynamic int8 quantization to the NER model's linear and LSTM layers when it runs on the
+                     CPU, defaults to ``False``. This is ignored when running on a GPU.
+        :type int8: bool
+        :param doc_cache_size: The number of distinct documents whose entities are remembered, so that repeated
+                               documents are not run through Stanza again, defaults to ``1024``. Set to ``0`` to
+                               disable.
+        :type doc_cache_size: int
+        :param workers: The number of processes used to annotate a list of documents, defaults to ``1``. Workers are
+                        only used when the models run on the CPU. Where ``fork`` is available the models are loaded
+                        before the worker processes are forked, so that they share one copy of them, otherwise each
+                        spawned worker loads its own copy.
+        :type workers: int
         :param name: Overrides the default name of the :class:``Detector``
         :type name: str, optional
         :param locale: The locale of the documents in the format: 2 letter lower-case language code followed by an
@@ -79,45 +218,292 @@ class StanzaEntityDetector(Detector):
         if enable_location:
             self.filth_lookup['LOC'] = LocationFilth
         self.ignored_words = ['tennant'] if ignored_words is None else ignored_words
+        self._ignored_set = normalise_words(self.ignored_words)
+        self.tokenize_batch_size = tokenize_batch_size
+        self.ner_batch_size = ner_batch_size
+        self.pretokenized = pretokenized
+        self.no_ssplit = no_ssplit
+        self.use_gpu = use_gpu
+        self.device = device
+        self.fp16 = fp16
+        self.int8 = int8
+        self.doc_cache_size = doc_cache_size
+        self.workers = workers
+        self._doc_cache = OrderedDict()  # type: OrderedDict[str, List[Tuple[int, int, str, str]]]
         self._downloaded = False
 
         super(StanzaEntityDetector, self).__init__(**kwargs)
 
-    @staticmethod
-    def _check_downloaded(directory: str = DEFAULT_STANZA_DIR) -> bool:
+    def _check_downloaded(self, directory: str = DEFAULT_STANZA_DIR) -> bool:
         """Check for a downloaded Stanza's resources.
 
+        The models are not removed while running, so once they are found the result is remembered.
+
         :param directory: The directory where Stanza's models will have been downloaded to, default is
                           ``stanza_resources`` in the home directory, else specified by the environment variable
                           ``STANZA_RESOURCES_DIR``.
         :type directory: str
-        :return: ``True`` if the directory exists and is not empty.
+        :return: ``True`` if the directory contains the English models.
         :rtype: bool
         """
-        directory = os.path.expanduser(directory)
-        if os.path.exists(directory) and 'en' in os.listdir(directory):
+        if self._downloaded:
             return True
-        return False
+        directory = os.path.expanduser(directory)
+        self._downloaded = os.path.isdir(os.path.join(directory, 'en'))
+        return self._downloaded
 
-    def iter_filth(self, text: str, document_name: Optional[str] = None):
-        """Yields discovered filth in the provided ``text``.
+    @classmethod
+    def _get_pipeline(cls, processors: Tuple[str, ...], lang: str = 'en', fp16: bool = False, int8: bool = False,
+                      **config: Any) -> Pipeline:
+        """Return a Stanza ``Pipeline``, building it only the first time it is requested.
+
+        :param processors: The Stanza processors to run in the pipeline.
+        :type processors: Tuple[str, ...]
+        :param lang: The language of the models to load, defaults to ``'en'``.
+        :type lang: str
+        :param fp16: Cast the NER model to half precision if it is on a GPU, defaults to ``False``.
+        :type fp16: bool
+        :param int8: Quantize the NER model to int8 if it is on the CPU, defaults to ``False``.
+        :type int8: bool
+        :param config: Any further keyword arguments to pass to the ``Pipeline``.
+        :type config: Any
+        :return: The cached ``Pipeline``
+        :rtype: Pipeline
+        """
+        key = (tuple(processors), lang, fp16, int8, tuple(sorted(config.items())))
+        with cls._pipeline_lock:
+            if key not in cls._pipeline_cache:
+                pipeline = Pipeline(lang=lang, processors=list(processors), download_method=None, **config)
+                if fp16:
+                    for trainer in _ner_trainers(pipeline):
+                        # Half precision is only worthwhile (and well supported) on the GPU
+                        if next(trainer.model.parameters()).is_cuda:
+                            trainer.model.half()
+                if int8:
+                    _quantize_ner(pipeline)
+                cls._pipeline_cache[key] = pipeline
+            return cls._pipeline_cache[key]
+
+    def _pipeline_config(self) -> Dict[str, Any]:
+        """Return the arguments to ``_get_pipeline`` for the pipeline configured for this detector.
+
+        :return: The keyword arguments of ``_get_pipeline``
+        :rtype: Dict[str, Any]
+        """
+        language, region = self.locale_split(self.locale)
+        return dict(
+            processors=('tokenize', 'ner'), lang=language,
+            tokenize_batch_size=self.tokenize_batch_size, ner_batch_size=self.ner_batch_size,
+            tokenize_pretokenized=self.pretokenized, tokenize_no_ssplit=self.no_ssplit,
+            use_gpu=self.use_gpu, device=self.device, fp16=self.fp16, int8=self.int8,
+        )
+
+    def _pipeline(self) -> Pipeline:
+        """Return the ``Pipeline`` configured for this detector, downloading the models if needed.
+
+        :return: The cached ``Pipeline``
+        :rtype: Pipeline
+        """
+        self._download_if_needed()
+        return type(self)._get_pipeline(**self._pipeline_config())
+
+    def warmup(self) -> None:
+        """Load the models now, rather than when the first document is annotated.
+
+        This is done automatically before forking worker processes, so that the workers share the models loaded in
+        the parent process.
+        """
+        self._pipeline()
 
-        :param text: The dirty text to clean.
+    def _download_if_needed(self) -> None:
+        """Download Stanza's English models if they are not already downloaded."""
+        if not self._check_downloaded():
+            stanza.download('en')
+            self._downloaded = True
+
+    @staticmethod
+    def _join_tokens(text: Union[str, List[List[str]]]) -> str:
+        """Join a pretokenized document given as a list of sentences of tokens, in the same way that Stanza does.
+
+        :param text: The text, or list of sentences that are each a list of tokens.
+        :type text: Union[str, List[List[str]]]
+        :return: The text of the document
+        :rtype: str
+        """
+        if isinstance(text, str):
+            return text
+        return '\n'.join(' '.join(sentence) for sentence in text)
+
+    @staticmethod
+    def _cache_key(text: str) -> str:
+        """Return the key of a document in the document cache.
+
+        :param text: The text of the document.
         :type text: str
+        :return: A hash of the text
+        :rtype: str
+        """
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _annotate(self, texts: Sequence[str], workers: Optional[int] = None) -> List[List[Tuple[int, int, str, str]]]:
+        """Run the documents through Stanza, only annotating each distinct document that is not already cached.
+
+        :param texts: The text of each document.
+        :type texts: Sequence[str]
+        :param workers: The number of worker processes to use, defaults to the ``workers`` of this detector.
+        :type workers: int, optional
+        :return: For each document, a list of tuples of the start, end, text and type of each entity
+        :rtype: List[List[Tuple[int, int, str, str]]]
+        """
+        keys = [self._cache_key(text) for text in texts]
+        results = {}  # type: Dict[str, List[Tuple[int, int, str, str]]]
+        missing = {}  # type: Dict[str, str]
+        for key, text in zip(keys, texts):
+            if key in self._doc_cache:
+                self._doc_cache.move_to_end(key)
+                results[key] = self._doc_cache[key]
+            else:
+                missing[key] = text
+
+        if len(missing) > 0:
+            if workers is None:
+                workers = self.workers
+            if workers > 1 and len(missing) > 1 and self._can_use_workers():
+                annotated = self._annotate_parallel(list(missing.values()), workers)
+            else:
+                annotated = self._annotate_in_process(list(missing.values()))
+            for key, entities in zip(missing.keys(), annotated):
+                results[key] = entities
+                if self.doc_cache_size > 0:
+                    self._doc_cache[key] = entities
+                    if len(self._doc_cache) > self.doc_cache_size:
+                        self._doc_cache.popitem(last=False)
+
+        return [results[key] for key in keys]
+
+    def _annotate_in_process(self, texts: List[str]) -> List[List[Tuple[int, int, str, str]]]:
+        """Run the documents through Stanza in this process, as a single batch.
+
+        :param texts: The text of each document.
+        :type texts: List[str]
+        :return: For each document, a list of tuples of the start, end, text and type of each entity
+        :rtype: List[List[Tuple[int, int, str, str]]]
+        """
+        pipeline = self._pipeline()
+        if self.pretokenized:
+            # Pretokenized text is split on whitespace from the raw string, rather than from a Document
+            docs = [pipeline(text) for text in texts]
+        else:
+            docs = pipeline([stanza.Document([], text=text) for text in texts])
+        return [_doc_entities(doc) for doc in docs]
+
+    def _uses_cuda(self) -> bool:
+        """Return whether the models of this detector run on a CUDA device.
+
+        :return: ``True`` if the models are placed on a CUDA device.
+        :rtype: bool
+        """
+        if self.device is not None:
+            return torch.device(self.device).type == 'cuda'
+        return self.use_gpu and torch.cuda.is_available()
+
+    def _can_use_workers(self) -> bool:
+        """Return whether documents can be annotated in worker processes, warning if not.
+
+        CUDA can't be used again in a process forked after it was initialised, and spawning workers would load a
+        copy of the models onto the device for each of them, so models on a CUDA device are run in this process.
+
+        :return: ``True`` if worker processes can be used.
+        :rtype: bool
+        """
+        if self._uses_cuda():
+            warnings.warn('Worker processes are not used when the models run on a CUDA device; annotating in this '
+                          'process instead.')
+            return False
+        return True
+
+    def _annotate_parallel(self, texts: List[str], workers: int) -> List[List[Tuple[int, int, str, str]]]:
+        """Run the documents through Stanza in a pool of worker processes.
+
+        The workers are forked where possible, so that they share the models loaded in this process, and spawned
+        otherwise, in which case each worker loads its own copy of the models.
+
+        :param texts: The text of each document.
+        :type texts: List[str]
+        :param workers: The number of worker processes.
+        :type workers: int
+        :return: For each document, a list of tuples of the start, end, text and type of each entity
+        :rtype: List[List[Tuple[int, int, str, str]]]
+        """
+        start_method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+        if start_method == 'fork':
+            # Load the models before forking, so that the workers share the parent's copy
+            self.warmup()
+        else:
+            # Download the models once here, rather than in each spawned worker
+            self._download_if_needed()
+        context = multiprocessing.get_context(start_method)
+        results = [[] for _ in texts]  # type: List[List[Tuple[int, int, str, str]]]
+        num_threads = max(1, (os.cpu_count() or 1) // workers)
+        with context.Pool(workers, initializer=_worker_init, initargs=(self._pipeline_config(), num_threads)) as pool:
+            chunk_size = max(1, len(texts) // (workers * 4))
+            for index, entities in pool.imap_unordered(_worker_annotate, enumerate(texts), chunksize=chunk_size):
+                results[index] = entities
+        return results
+
+    def iter_filth(self, text: Union[str, List[List[str]]], document_name: Optional[str] = None):
+        """Yields discovered filth in the provided ``text``.
+
+        :param text: The dirty text to clean, or if ``pretokenized`` a list of sentences of tokens.
+        :type text: Union[str, List[List[str]]]
         :param document_name: The name of the document to clean.
         :type document_name: Optional[str]
         :return: An iterator to the discovered :class:`Filth`
         :rtype: Iterator[:class:`Filth`]
         """
-        processors = ['tokenize', 'ner']
-        if not self._check_downloaded():
-            pipeline = Pipeline(processors=processors)
-        pipeline = Pipeline(processors=processors, download_method=None)
-        doc = pipeline(text)
-        # List of tuples of text/type for each entity in document
-        tags = [(ent.text, ent.type) for ent in doc.ents]
-        return tag_helper(text=text, tags=tags, filth_lookup=self.filth_lookup, ignored_words=self.ignored_words,
-                          name=self.name, locale=self.locale, document_name=document_name)
+        text = self._join_tokens(text)
+        entities = self._annotate([text])[0]
+        return offset_helper(text=text, entities=entities, filth_lookup=self.filth_lookup,
+                             ignored_set=self._ignored_set, name=self.name, locale=self.locale,
+                             document_name=document_name)
+
+    def iter_filth_documents(self, document_list: Sequence[str], document_names: Sequence[Optional[str]]):
+        """Yields discovered filth in a list of documents, running them through Stanza as a single batch.
+
+        :param document_list: A list of documents to clean.
+        :type document_list: Sequence[str]
+        :param document_names: A list containing the name of each document.
+        :type document_names: Sequence[Optional[str]]
+        :return: An iterator to the discovered :class:`Filth`
+        :rtype: Iterator[:class:`Filth`]
+        """
+        if len(document_list) == 0:
+            return
+        yield from self.iter_filth_many(document_list, document_names=document_names)
+
+    def iter_filth_many(self, texts: Iterable[str], document_names: Optional[Iterable[Optional[str]]] = None,
+                        workers: Optional[int] = None):
+        """Yields discovered filth in many documents, annotating them in parallel in a pool of worker processes.
+
+        :param texts: The documents to clean.
+        :type texts: Iterable[str]
+        :param document_names: The name of each document, defaults to ``None`` for every document.
+        :type document_names: Iterable[Optional[str]], optional
+        :param workers: The number of worker processes, defaults to the ``workers`` of this detector.
+        :type workers: int, optional
+        :return: An iterator to the discovered :class:`Filth`
+        :rtype: Iterator[:class:`Filth`]
+        """
+        document_list = [self._join_tokens(text) for text in texts]
+        names = [None] * len(document_list)  # type: List[Optional[str]]
+        if document_names is not None:
+            names = list(document_names)
+        annotated = self._annotate(document_list, workers=workers)
+        for entities, text, document_name in zip(annotated, document_list, names):
+            yield from offset_helper(
+                text=text, entities=entities, filth_lookup=self.filth_lookup, ignored_set=self._ignored_set,
+                name=self.name, locale=self.locale, document_name=document_name,
+            )
 
     @classmethod
     def supported_locale(cls, locale: str) -> bool:
@@ -1 +1 @@
-from .utils import tag_helper
+from .utils import tag_helper, offset_helper, normalise_words, validate_backend
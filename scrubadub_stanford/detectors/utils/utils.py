@@ -1,22 +1,279 @@
 """
-Helper function for iterating through annotated list of entities done by Stanford NER models"
+Helper functions for iterating through annotated list of entities done by Stanford NER models"
 """
-from typing import Dict, Type, List, Tuple, Optional
+from typing import Dict, Type, List, Tuple, Optional, Any, Iterator, Iterable, FrozenSet
+import functools
 import re
 
+import numpy as np
+
 from scrubadub.filth.base import Filth
 
+# The regex engines that tag_helper can use to find the tagged entities in the text
+TAG_BACKENDS = ('re', 're2', 'hyperscan')
+
+try:
+    import numba
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+
+def normalise_words(words: Iterable[str]) -> FrozenSet[str]:
+    """
+    Normalise a list of words, such as the ignored words of a Detector, for comparison against entity text
+
+    :param words: The words to normalise
+    :type words: Iterable[str]
+    :return: The set of stripped and case-folded words
+    :rtype: FrozenSet[str]
+    """
+    return frozenset(word.strip().casefold() for word in words)
+
+
+@functools.lru_cache(maxsize=8192)
+def _entity_to_pattern(person: str) -> str:
+    """
+    Convert an entity string to a regex that matches it as whole words with any whitespace between the words
+
+    :param person: The entity string
+    :type person: str
+    :return: The regex for the entity
+    :rtype: str
+    """
+    return r'\b' + re.escape(person).replace(r'\ ', r'\s+') + r'\b'
+
+
+@functools.lru_cache(maxsize=8192)
+def _entity_to_re2_pattern(person: str) -> str:
+    """
+    Convert an entity string to an RE2 regex that matches its words with any unicode whitespace between them
+
+    RE2's ``\\b`` and ``\\s`` only know about ascii, so the word boundaries are added around the whole alternation
+    by ``_compile_tag_pattern`` instead.
+
+    :param person: The entity string
+    :type person: str
+    :return: The RE2 regex for the entity
+    :rtype: str
+    """
+    return re.escape(person).replace(r'\ ', r'[\s\p{Z}]+')
+
+
+@functools.lru_cache(maxsize=4096)
+def _compile_tag_pattern(grouped_tags: Tuple[Tuple[str, Tuple[str, ...]], ...],
+                         backend: str = 're') -> Tuple[Any, Dict[str, str]]:
+    """
+    Build and compile a single regex that finds every one of the grouped tags, cached as the same entities recur
+    across documents
+
+    :param grouped_tags: Tuples of tag type and the de-duped entity strings of that type
+    :type grouped_tags: Tuple[Tuple[str, Tuple[str, ...]], ...]
+    :param backend: The regex engine to compile with, either ``'re'`` or ``'re2'``
+    :type backend: str
+    :return: The compiled regex and a lookup from the name of each regex group to its tag type
+    :rtype: Tuple[Any, Dict[str, str]]
+    """
+    # convert to regex, longest first across all tag types so that the longest entity wins in the alternation,
+    # whatever its type. Each entity gets its own named group so the type of each match can be looked up.
+    to_pattern = _entity_to_re2_pattern if backend == 're2' else _entity_to_pattern
+    entities = sorted(
+        ((to_pattern(person), tag_type) for tag_type, tag_list in grouped_tags for person in tag_list),
+        key=lambda entity: len(entity[0]), reverse=True,
+    )
+    group_types = {}  # type: Dict[str, str]
+    alternatives = []
+    for entity_pattern, tag_type in entities:
+        group = 'tag{}'.format(len(group_types))
+        group_types[group] = tag_type
+        alternatives.append('(?P<{}>{})'.format(group, entity_pattern))
+
+    combined_regex = '|'.join(alternatives)
+    if backend == 're2':
+        try:
+            import re2
+        except ImportError:
+            raise ImportError(
+                'To use the re2 backend extra dependencies need to be installed.\n'
+                'Please run: pip install google-re2'
+            )
+        # RE2 has no unicode word boundaries or lookarounds, so the characters either side of the entity are
+        # matched too; they must be the start or end of the text or a character that is not a letter, digit or _
+        boundary = r'[^\pL\pN_]'
+        combined_regex = r'(?:^|{boundary})(?:{entities})(?:$|{boundary})'.format(
+            boundary=boundary, entities=combined_regex
+        )
+        return re2.compile(combined_regex), group_types
+
+    try:
+        pattern = re.compile(combined_regex, re.MULTILINE | re.UNICODE)
+    except re.error:
+        print(combined_regex)
+        raise
+    return pattern, group_types
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_hyperscan_database(grouped_tags: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> Tuple[Any, List[str]]:
+    """
+    Compile a Hyperscan database with one expression for each of the grouped tags, so that they are all matched
+    in a single scan of the document
+
+    :param grouped_tags: Tuples of tag type and the de-duped entity strings of that type
+    :type grouped_tags: Tuple[Tuple[str, Tuple[str, ...]], ...]
+    :return: The Hyperscan database and the tag type of each expression id
+    :rtype: Tuple[Any, List[str]]
+    """
+    try:
+        import hyperscan
+    except ImportError:
+        raise ImportError(
+            'To use the hyperscan backend extra dependencies need to be installed.\n'
+            'Please run: pip install hyperscan'
+        )
+
+    # Hyperscan doesn't support \b in UCP mode, so the bare entities are matched and the word boundaries are checked
+    # by _iter_matches instead
+    expressions = []  # type: List[bytes]
+    expression_types = []  # type: List[str]
+    for tag_type, tag_list in grouped_tags:
+        for person in tag_list:
+            expressions.append(re.escape(person).replace(r'\ ', r'\s+').encode('utf-8'))
+            expression_types.append(tag_type)
+
+    # SOM_LEFTMOST is needed for hyperscan to report where each match starts, not only where it ends
+    flags = hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP | hyperscan.HS_FLAG_MULTILINE | \
+        hyperscan.HS_FLAG_SOM_LEFTMOST
+    database = hyperscan.Database()
+    database.compile(
+        expressions=expressions, ids=list(range(len(expressions))), elements=len(expressions),
+        flags=[flags] * len(expressions),
+    )
+    return database, expression_types
+
+
+def _is_word_boundary(encoded: bytes, start: int, end: int) -> bool:
+    """
+    Check that a match in the UTF-8 encoded text is not preceded or followed by a letter, digit or ``_``
+
+    :param encoded: The UTF-8 encoded text
+    :type encoded: bytes
+    :param start: The byte offset of the start of the match
+    :type start: int
+    :param end: The byte offset of the end of the match
+    :type end: int
+    :return: ``True`` if the match starts and ends on a word boundary
+    :rtype: bool
+    """
+    # A character is at most four bytes, so only the bytes either side of the match need decoding; any partial
+    # character cut off at the far end of these slices is dropped
+    before = encoded[max(0, start - 4):start].decode('utf-8', errors='ignore')[-1:]
+    after = encoded[end:end + 4].decode('utf-8', errors='ignore')[:1]
+    return not any(char.isalnum() or char == '_' for char in before + after)
+
+
+def _iter_matches(text: str, grouped_tags: Tuple[Tuple[str, Tuple[str, ...]], ...],
+                  backend: str = 're') -> Iterator[Tuple[str, int, int]]:
+    """
+    Search the text for the grouped tags with the chosen regex engine
+
+    The longest entity is matched at each position. An entity that overlaps a match is also returned if it extends
+    past the end of the match, so that no part of either is left in the text, but an entity that lies within a
+    match is not, eg ``Washington`` inside ``Washington DC``.
+
+    :param text: The text to search
+    :type text: str
+    :param grouped_tags: Tuples of tag type and the de-duped entity strings of that type
+    :type grouped_tags: Tuple[Tuple[str, Tuple[str, ...]], ...]
+    :param backend: The regex engine to use, one of ``'re'``, ``'re2'`` or ``'hyperscan'``, as checked by
+                    ``validate_backend``
+    :type backend: str
+    :return: Iterator of the tag type, start and end of each match
+    :rtype: Iterator[Tuple[str, int, int]]
+    """
+    if backend == 'hyperscan':
+        database, expression_types = _compile_hyperscan_database(grouped_tags)
+        encoded = text.encode('utf-8')
+        hits = []  # type: List[Tuple[int, int, int]]
+
+        def on_match(expression_id: int, start: int, end: int, flags: int, context: List[Tuple[int, int, int]]):
+            context.append((start, end, expression_id))
+
+        database.scan(encoded, match_event_handler=on_match, context=hits)
+
+        # Hyperscan reports every match, so keep the leftmost, longest matches that are whole words and are not
+        # contained in a previous match to give the same results as the other backends
+        byte_offset, char_offset = 0, 0
+        previous_end = 0
+        for start, end, expression_id in sorted(hits, key=lambda hit: (hit[0], -hit[1])):
+            if end <= previous_end or not _is_word_boundary(encoded, start, end):
+                continue
+            previous_end = end
+            # Hyperscan reports byte offsets; the kept matches start in order so only the text since the previous
+            # start needs decoding to find the character offsets
+            if len(encoded) != len(text):
+                char_start = char_offset + len(encoded[byte_offset:start].decode('utf-8'))
+                byte_offset, char_offset = start, char_start
+                start, end = char_start, char_start + len(encoded[start:end].decode('utf-8'))
+            yield expression_types[expression_id], start, end
+    elif backend == 're2':
+        pattern, group_types = _compile_tag_pattern(grouped_tags, backend=backend)
+        # The match includes the boundary characters around the entity, so the next search starts at the start of the
+        # entity to let the characters inside it be the boundary before an overlapping entity
+        position, previous_end = 0, 0
+        while True:
+            instance = pattern.search(text, position)
+            if instance is None:
+                break
+            # google-re2 only accepts the index of a group, not its name
+            start, end = instance.span(instance.lastindex)
+            if end > previous_end:
+                yield group_types[instance.lastgroup], start, end
+                previous_end = end
+            position = max(start, position + 1)
+    elif backend == 're':
+        pattern, group_types = _compile_tag_pattern(grouped_tags, backend=backend)
+        # Search again from just after the start of each match, to find entities that overlap it
+        position, previous_end = 0, 0
+        while True:
+            instance = pattern.search(text, position)
+            if instance is None:
+                break
+            start, end = instance.span()
+            if end > previous_end:
+                yield group_types[instance.lastgroup], start, end
+                previous_end = end
+            position = start + 1
+
+
+def validate_backend(backend: str) -> None:
+    """
+    Check that the backend is one of ``TAG_BACKENDS``
 
-def tag_helper(text: str, tags: List[Tuple[str, str]], filth_lookup: Dict[str, Type[Filth]], ignored_words: List[str],
-               name: str, locale: str, document_name: Optional[str] = None):
+    :param backend: The regex engine to check
+    :type backend: str
+    :raises ValueError: If the backend is not known
+    """
+    if backend not in TAG_BACKENDS:
+        raise ValueError(
+            "Unknown backend '{}', expected one of {}".format(backend, ', '.join(repr(b) for b in TAG_BACKENDS))
+        )
+
+
+def tag_helper(text: str, tags: Iterable[Tuple[str, str]], filth_lookup: Dict[str, Type[Filth]],
+               ignored_words: List[str], name: str, locale: str, document_name: Optional[str] = None,
+               backend: str = 're'):
     """
     Helper function to iterate through a list of tuples that contain the string and its entity tag to check if for
     matching filth or if the string should be ignored and returns what is expected from Detector base class's iter_filth
 
+    Overlapping entities, such as a PERSON ``Jane Smith`` and an ORG ``Smith Corp`` in ``'Jane Smith Corp'``, are
+    both returned and merged by scrubadub, while an entity that lies within a longer one is not returned.
+
     :param text: The text of the annotated Document for reverse search of index
     :type text: str
-    :param tags: The list of tuples of annotated entities
-    :type tags: List[Tuple[str, str]]
+    :param tags: The tuples of annotated entities, which are only iterated over once
+    :type tags: Iterable[Tuple[str, str]]
     :param filth_lookup: The type of Filth identified by its annotation
     :type filth_lookup: Dict[str, Type[Filth]]
     :param ignored_words: List of words to ignore, set in the Stanford-type Detector's init params
@@ -27,47 +284,165 @@ def tag_helper(text: str, tags: List[Tuple[str, str]], filth_lookup: Dict[str, T
     :type locale: str
     :param document_name: Name of the document if specified
     :type document_name: Optional[str]
+    :param backend: The regex engine used to find the entities in the text, one of ``'re'``, ``'re2'`` or
+                    ``'hyperscan'``, defaults to ``'re'``
+    :type backend: str
     :return: Iterator of discovered Filth
     :rtype: Generator[Type[Filth]]
     """
-    grouped_tags = {}  # type: Dict[str, List[str]]
+    validate_backend(backend)
+    ignored_set = normalise_words(ignored_words)
+    # Contiguous tags of the same type are collected as lists of words and only joined at the end
+    grouped_tags = {}  # type: Dict[str, List[List[str]]]
     previous_tag = None
     for tag_text, tag_type in tags:
-        if tag_type in filth_lookup.keys() and not any(
-                [tag_text.lower().strip() == ignored.lower().strip() for ignored in ignored_words]):
+        if tag_type in filth_lookup and tag_text.strip().casefold() not in ignored_set:
             if previous_tag == tag_type:
-                grouped_tags[tag_type][-1] = grouped_tags[tag_type][-1] + ' ' + tag_text
+                grouped_tags[tag_type][-1].append(tag_text)
             else:
-                grouped_tags[tag_type] = grouped_tags.get(tag_type, []) + [tag_text]
+                grouped_tags.setdefault(tag_type, []).append([tag_text])
 
             previous_tag = tag_type
         else:
             previous_tag = None
 
-    # for each set of tags, de-dupe and convert to regex
-    for tag_type, tag_list in grouped_tags.items():
-        grouped_tags[tag_type] = [
-            r'\b' + re.escape(person).replace(r'\ ', r'\s+') + r'\b'
-            for person in set(tag_list)
-        ]
-
-    # Now look for these in the original document
-    for tag_type, tag_list in grouped_tags.items():
-        for tag_regex in tag_list:
-            try:
-                pattern = re.compile(tag_regex, re.MULTILINE | re.UNICODE)
-            except re.error:
-                print(tag_regex)
-                raise
-            found_strings = re.finditer(pattern, text)
-
-            # Iterate over each found string matching this regex and yield some filth
-            for instance in found_strings:
-                yield filth_lookup[tag_type](
-                    beg=instance.start(),
-                    end=instance.end(),
-                    text=instance.group(),
-                    detector_name=name,
-                    document_name=document_name,
-                    locale=locale,
-                )
+    if len(grouped_tags) == 0:
+        return
+
+    # for each set of tags, de-dupe and look for them in the original document
+    grouped_entities = tuple(
+        (tag_type, tuple(sorted({' '.join(parts) for parts in groups}))) for tag_type, groups in grouped_tags.items()
+    )
+
+    # Iterate over each found string matching these regexes and yield some filth
+    for tag_type, beg, end in _iter_matches(text, grouped_entities, backend=backend):
+        yield filth_lookup[tag_type](
+            beg=beg,
+            end=end,
+            text=text[beg:end],
+            detector_name=name,
+            document_name=document_name,
+            locale=locale,
+        )
+
+
+def _group_entities_loop(starts: np.ndarray, ends: np.ndarray, type_ids: np.ndarray,
+                         joinable: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Merge runs of entities of the same type that are joinable into groups, in one loop that numba compiles
+
+    :param starts: The start offset of each entity
+    :type starts: np.ndarray
+    :param ends: The end offset of each entity
+    :type ends: np.ndarray
+    :param type_ids: The type of each entity
+    :type type_ids: np.ndarray
+    :param joinable: Whether the gap between each entity and the next allows them to be joined
+    :type joinable: np.ndarray
+    :return: The start offset, end offset and type of each group
+    :rtype: Tuple[np.ndarray, np.ndarray, np.ndarray]
+    """
+    group_starts = np.empty(len(starts), dtype=np.int64)
+    group_ends = np.empty(len(starts), dtype=np.int64)
+    group_types = np.empty(len(starts), dtype=np.int8)
+    count = 0
+    for i in range(len(starts)):
+        if i > 0 and joinable[i - 1] and type_ids[i] == type_ids[i - 1]:
+            group_ends[count - 1] = ends[i]
+        else:
+            group_starts[count] = starts[i]
+            group_ends[count] = ends[i]
+            group_types[count] = type_ids[i]
+            count += 1
+    return group_starts[:count], group_ends[:count], group_types[:count]
+
+
+def _group_entities_numpy(starts: np.ndarray, ends: np.ndarray, type_ids: np.ndarray,
+                          joinable: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Merge runs of entities of the same type that are joinable into groups, with vectorised NumPy operations
+
+    :param starts: The start offset of each entity
+    :type starts: np.ndarray
+    :param ends: The end offset of each entity
+    :type ends: np.ndarray
+    :param type_ids: The type of each entity
+    :type type_ids: np.ndarray
+    :param joinable: Whether the gap between each entity and the next allows them to be joined
+    :type joinable: np.ndarray
+    :return: The start offset, end offset and type of each group
+    :rtype: Tuple[np.ndarray, np.ndarray, np.ndarray]
+    """
+    if len(starts) == 0:
+        return starts, ends, type_ids
+    contiguous = joinable & (type_ids[1:] == type_ids[:-1])
+    group_firsts = np.flatnonzero(np.concatenate(([True], ~contiguous)))
+    group_lasts = np.concatenate((group_firsts[1:], [len(starts)])) - 1
+    return starts[group_firsts], ends[group_lasts], type_ids[group_firsts]
+
+
+# Without numba, the vectorised version avoids looping over the entities in python
+if HAVE_NUMBA:
+    _group_entities = numba.njit(cache=True)(_group_entities_loop)
+else:
+    _group_entities = _group_entities_numpy
+
+
+def offset_helper(text: str, entities: List[Tuple[int, int, str, str]], filth_lookup: Dict[str, Type[Filth]],
+                  ignored_set: FrozenSet[str], name: str, locale: str, document_name: Optional[str] = None):
+    """
+    Helper function to turn entities that are annotated with their character offsets into Filth, without
+    searching the text again. Contiguous entities of the same type, only separated by a single space, are grouped
+    into one Filth.
+
+    :param text: The text of the annotated Document
+    :type text: str
+    :param entities: The tuples of start offset, end offset, text and type of each annotated entity
+    :type entities: List[Tuple[int, int, str, str]]
+    :param filth_lookup: The type of Filth identified by its annotation
+    :type filth_lookup: Dict[str, Type[Filth]]
+    :param ignored_set: Set of words to ignore, as normalised by ``normalise_words``
+    :type ignored_set: FrozenSet[str]
+    :param name: Name of the Detector class
+    :type name: str
+    :param locale: Locale of the Detector's annotation model
+    :type locale: str
+    :param document_name: Name of the document if specified
+    :type document_name: Optional[str]
+    :return: Iterator of discovered Filth
+    :rtype: Generator[Type[Filth]]
+    """
+    if len(entities) == 0:
+        return
+
+    # Work on arrays of the offsets and type of each entity, with a type of -1 for entities that are ignored
+    type_names = list(filth_lookup)
+    type_index = {tag_type: i for i, tag_type in enumerate(type_names)}
+    starts = np.fromiter((ent[0] for ent in entities), dtype=np.int64, count=len(entities))
+    ends = np.fromiter((ent[1] for ent in entities), dtype=np.int64, count=len(entities))
+    type_ids = np.fromiter(
+        (-1 if ent_text.strip().casefold() in ignored_set else type_index.get(ent_type, -1)
+         for _, _, ent_text, ent_type in entities),
+        dtype=np.int8, count=len(entities),
+    )
+    keep = type_ids >= 0
+    starts, ends, type_ids = starts[keep], ends[keep], type_ids[keep]
+    if len(starts) == 0:
+        return
+
+    # Contiguous entities of the same type, only separated by a single space, are grouped together
+    gaps = starts[1:] - ends[:-1]
+    joinable = gaps == 0
+    for i in np.flatnonzero(gaps == 1):
+        joinable[i] = text[ends[i]] == ' '
+    group_starts, group_ends, group_types = _group_entities(starts, ends, type_ids, joinable)
+
+    for beg, end, type_id in zip(group_starts.tolist(), group_ends.tolist(), group_types.tolist()):
+        yield filth_lookup[type_names[type_id]](
+            beg=beg,
+            end=end,
+            text=text[beg:end],
+            detector_name=name,
+            document_name=document_name,
+            locale=locale,
+        )
@@ -0,0 +1,156 @@
+import importlib.util
+import unittest
+
+import numpy as np
+
+from scrubadub.filth.location import LocationFilth
+from scrubadub.filth.name import NameFilth
+from scrubadub.filth.organization import OrganizationFilth
+
+from scrubadub_stanford.detectors.utils.utils import (
+    _group_entities_loop, _group_entities_numpy, offset_helper, tag_helper
+)
+
+
+def importable(module):
+    return importlib.util.find_spec(module) is not None
+
+
+class GroupEntitiesTestCase(unittest.TestCase):
+
+    def check_group(self, text, entities, expected):
+        """Check that both implementations group the (start, end, type id) entities in the text as expected"""
+        starts = np.array([ent[0] for ent in entities], dtype=np.int64)
+        ends = np.array([ent[1] for ent in entities], dtype=np.int64)
+        type_ids = np.array([ent[2] for ent in entities], dtype=np.int8)
+        joinable = np.array([text[end:start] in ('', ' ') for start, end in zip(starts[1:], ends[:-1])], dtype=bool)
+
+        for group_entities in (_group_entities_loop, _group_entities_numpy):
+            group_starts, group_ends, group_types = group_entities(starts, ends, type_ids, joinable)
+            self.assertEqual(
+                list(zip(group_starts.tolist(), group_ends.tolist(), group_types.tolist())),
+                expected,
+                group_entities.__name__,
+            )
+
+    def test_empty(self):
+        self.check_group('', [], [])
+
+    def test_single_entity(self):
+        self.check_group('Jane', [(0, 4, 0)], [(0, 4, 0)])
+
+    def test_no_gap(self):
+        self.check_group('JaneSmith', [(0, 4, 0), (4, 9, 0)], [(0, 9, 0)])
+
+    def test_space(self):
+        self.check_group('Jane Mary Smith', [(0, 4, 0), (5, 9, 0), (10, 15, 0)], [(0, 15, 0)])
+
+    def test_new_line(self):
+        self.check_group('Jane\nSmith', [(0, 4, 0), (5, 10, 0)], [(0, 4, 0), (5, 10, 0)])
+
+    def test_wider_gap(self):
+        self.check_group('Jane  Smith', [(0, 4, 0), (6, 11, 0)], [(0, 4, 0), (6, 11, 0)])
+
+    def test_mixed_types(self):
+        self.check_group(
+            'Jane Smith Acme Corp\nJohn Doe',
+            [(0, 4, 0), (5, 10, 0), (11, 15, 1), (16, 20, 1), (21, 25, 0), (26, 29, 0)],
+            [(0, 10, 0), (11, 20, 1), (21, 29, 0)],
+        )
+
+
+class OffsetHelperTestCase(unittest.TestCase):
+
+    filth_lookup = {'PERSON': NameFilth, 'ORG': OrganizationFilth}
+
+    def get_filth(self, text, entities, ignored_set=frozenset()):
+        return [
+            (type(filth), filth.beg, filth.end, filth.text)
+            for filth in offset_helper(text=text, entities=entities, filth_lookup=self.filth_lookup,
+                                       ignored_set=ignored_set, name='stanza', locale='en_US')
+        ]
+
+    def test_empty(self):
+        self.assertEqual(self.get_filth('Nothing here.', []), [])
+
+    def test_grouping(self):
+        text = 'Jane Smith works at Acme Corp'
+        entities = [(0, 4, 'Jane', 'PERSON'), (5, 10, 'Smith', 'PERSON'),
+                    (20, 24, 'Acme', 'ORG'), (25, 29, 'Corp', 'ORG')]
+        self.assertEqual(
+            self.get_filth(text, entities),
+            [(NameFilth, 0, 10, 'Jane Smith'), (OrganizationFilth, 20, 29, 'Acme Corp')],
+        )
+
+    def test_unknown_and_ignored(self):
+        text = 'Tennant met Jane in Paris'
+        entities = [(0, 7, 'Tennant', 'PERSON'), (12, 16, 'Jane', 'PERSON'), (20, 25, 'Paris', 'LOC')]
+        self.assertEqual(
+            self.get_filth(text, entities, ignored_set=frozenset(['tennant'])),
+            [(NameFilth, 12, 16, 'Jane')],
+        )
+
+
+class TagHelperTestCase(unittest.TestCase):
+
+    filth_lookup = {'PERSON': NameFilth, 'ORG': OrganizationFilth, 'LOCATION': LocationFilth}
+
+    def get_filth(self, text, tags, backend='re'):
+        return [
+            (type(filth), filth.beg, filth.end, filth.text)
+            for filth in tag_helper(text=text, tags=tags, filth_lookup=self.filth_lookup, ignored_words=[],
+                                    name='stanford', locale='en_US', backend=backend)
+        ]
+
+    def test_longest_entity_across_types(self):
+        text = 'Washington DC and Washington'
+        tags = [('Washington', 'LOCATION'), ('DC', 'LOCATION'), ('and', 'O'), ('Washington', 'PERSON')]
+        self.assertEqual(
+            self.get_filth(text, tags),
+            [(LocationFilth, 0, 13, 'Washington DC'), (NameFilth, 18, 28, 'Washington')],
+        )
+
+    def test_overlapping_entities(self):
+        text = 'Jane Smith Corp'
+        tags = [('Jane', 'PERSON'), ('Smith', 'PERSON'), ('Smith', 'ORG'), ('Corp', 'ORG')]
+        self.assertEqual(
+            self.get_filth(text, tags),
+            [(NameFilth, 0, 10, 'Jane Smith'), (OrganizationFilth, 5, 15, 'Smith Corp')],
+        )
+
+
+class TagHelperBackendTestCase(unittest.TestCase):
+
+    filth_lookup = TagHelperTestCase.filth_lookup
+    get_filth = TagHelperTestCase.get_filth
+
+    def check_backend(self, backend):
+        """Check that the backend finds the same filth as the re backend"""
+        cases = [
+            ('Jane Smith works at Acme Corp with Jane',
+             [('Jane', 'PERSON'), ('Smith', 'PERSON'), ('Acme', 'ORG'), ('Corp', 'ORG'), ('Jane', 'PERSON')]),
+            ('José met Ünal\xa0Über, but not éJosé or José_',
+             [('José', 'PERSON'), ('met', 'O'), ('Ünal', 'PERSON'), ('Über', 'PERSON')]),
+            ('Jane,Bob', [('Jane', 'PERSON'), (',', 'O'), ('Bob', 'PERSON')]),
+            ('\U0001F600 Jane \U0001F600\U0001F600 Bob\U0001F600 Jane',
+             [('Jane', 'PERSON'), ('\U0001F600', 'O'), ('Bob', 'PERSON')]),
+            ('Washington DC and Washington',
+             [('Washington', 'LOCATION'), ('DC', 'LOCATION'), ('and', 'O'), ('Washington', 'PERSON')]),
+            ('Jane Smith Corp', [('Jane', 'PERSON'), ('Smith', 'PERSON'), ('Smith', 'ORG'), ('Corp', 'ORG')]),
+        ]
+        for text, tags in cases:
+            expected = self.get_filth(text, tags, 're')
+            self.assertNotEqual(expected, [], text)
+            self.assertEqual(self.get_filth(text, tags, backend), expected, text)
+
+    @unittest.skipUnless(importable('re2'), 'google-re2 is not installed')
+    def test_re2(self):
+        self.check_backend('re2')
+
+    @unittest.skipUnless(importable('hyperscan'), 'hyperscan is not installed')
+    def test_hyperscan(self):
+        self.check_backend('hyperscan')
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            list(self.get_filth('Jane', [('Jane', 'PERSON')], 'pcre'))